@@ -1,445 +1,618 @@
-#!/usr/bin/env python3
-"""
-Throttle GUI v5 — Final Stable Version
---------------------------------------
-Combines modern GUI styling, safe PowerShell process handling,
-and silent background proxy execution.
-"""
-
-import os
-import sys
-import subprocess
-import threading
-import time
-import psutil
-import tkinter as tk
-from tkinter import ttk, messagebox
-import socket
-import tempfile
-import shutil
-from pathlib import Path 
-import platform, time
-import traceback
-
-def get_proxy_path():
-    """
-    Return the correct proxy path based on platform and build type.
-    - On Windows: use bundled bandwidth_proxy.exe
-    - On macOS/Linux: use bundled bandwidth_proxy.py (or binary if built)
-    """
-    
-
-    # Determine runtime base directory (PyInstaller or local)
-    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(sys.argv[0])))
-    sys_os = platform.system().lower()
-
-    exe_proxy = os.path.join(base, "bandwidth_proxy.exe")
-    bin_proxy = os.path.join(base, "bandwidth_proxy")
-    py_proxy = os.path.join(base, "bandwidth_proxy.py")
-
-    # --- Windows build: prefer .exe ---
-    if sys_os == "windows" and os.path.exists(exe_proxy):
-        return exe_proxy
-
-    # --- macOS/Linux build: prefer .py, fallback to compiled binary ---
-    if os.path.exists(py_proxy):
-        return py_proxy
-    if os.path.exists(bin_proxy):
-        return bin_proxy
-
-    # --- Fallback (development mode) ---
-    return exe_proxy if sys_os == "windows" else py_proxy
-
-
-
-
-
-
-def find_browsers():
-    """Locate common browsers on Windows and macOS."""
-    paths = {}
-    sys_os = platform.system().lower()
-
-    if sys_os == "windows":
-        common = {
-            "Edge": [
-                r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
-                r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
-            ],
-            "Chrome": [
-                r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-                r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-            ],
-            "Brave": [
-                r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe",
-                r"C:\Program Files (x86)\BraveSoftware\Brave-Browser\Application\brave.exe",
-            ],
-            "Firefox": [
-                r"C:\Program Files\Mozilla Firefox\firefox.exe",
-                r"C:\Program Files (x86)\Mozilla Firefox\firefox.exe",
-            ],
-            "Tor": [
-                r"C:\Program Files\Tor Browser\Browser\firefox.exe",
-                r"C:\Program Files (x86)\Tor Browser\Browser\firefox.exe",
-            ],
-            "DuckDuckGo": [
-                r"C:\Program Files\DuckDuckGo\DuckDuckGo Browser\Application\duckduckgo.exe",
-                r"C:\Program Files (x86)\DuckDuckGo\DuckDuckGo Browser\Application\duckduckgo.exe",
-            ],
-            "Safari": [],  # Safari not on Windows
-        }
-
-    elif sys_os == "darwin":  # macOS
-        common = {
-            "Safari": ["/Applications/Safari.app/Contents/MacOS/Safari"],
-            "Chrome": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
-            "Brave": ["/Applications/Brave Browser.app/Contents/MacOS/Brave Browser"],
-            "Edge": ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"],
-            "Firefox": ["/Applications/Firefox.app/Contents/MacOS/firefox"],
-            "DuckDuckGo": ["/Applications/DuckDuckGo.app/Contents/MacOS/DuckDuckGo"],
-            "Tor": ["/Applications/Tor Browser.app/Contents/MacOS/firefox"],
-        }
-    else:
-        common = {}
-
-    for name, guesses in common.items():
-        for g in guesses:
-            if os.path.exists(g):
-                paths[name] = g
-                break
-    return paths
-
-
-
-class ThrottleApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Throttle Test Environment")
-        self.root.geometry("680x560")
-        self.root.resizable(False, False)
-        self.proxy_proc = None
-        self.browser_paths = find_browsers()
-        self.current_port = 8888
-
-        style = ttk.Style()
-        style.configure("TButton", padding=6, font=("Segoe UI", 10))
-        style.configure("TLabel", font=("Segoe UI", 10))
-        style.configure("TEntry", font=("Segoe UI", 10))
-
-        frm = ttk.Frame(root, padding=20)
-        frm.pack(fill="both", expand=True)
-        frm.grid_rowconfigure(7, weight=1)
-        frm.grid_columnconfigure(0, weight=1)
-
-        # Input fields
-        ttk.Label(frm, text="Upload (kbps):").grid(row=0, column=0, sticky="e", pady=5)
-        ttk.Label(frm, text="Download (kbps):").grid(row=1, column=0, sticky="e", pady=5)
-        ttk.Label(frm, text="Calibration (×):").grid(row=2, column=0, sticky="e", pady=5)
-
-        self.up_var = tk.StringVar(value="200")
-        self.down_var = tk.StringVar(value="500")
-        self.calib_var = tk.StringVar(value="1.0")
-
-        ttk.Entry(frm, textvariable=self.up_var, width=12).grid(row=0, column=1, sticky="w")
-        ttk.Entry(frm, textvariable=self.down_var, width=12).grid(row=1, column=1, sticky="w")
-        ttk.Entry(frm, textvariable=self.calib_var, width=12).grid(row=2, column=1, sticky="w")
-
-        self.preset_combo = ttk.Combobox(
-            frm,
-            values=["1.0 (None)", "2.0 (Light PC)", "3.0 (Win64 fast)"],
-            state="readonly",
-            width=18,
-        )
-        self.preset_combo.grid(row=3, column=1, sticky="w")
-        self.preset_combo.bind(
-            "<<ComboboxSelected>>",
-            lambda e: self.calib_var.set(self.preset_combo.get().split()[0]),
-        )
-
-        ttk.Button(frm, text="Start Proxy", command=self.start_proxy).grid(
-            row=4, column=0, pady=10
-        )
-        ttk.Button(frm, text="Stop Proxy", command=self.stop_proxy).grid(
-            row=4, column=1, pady=10
-        )
-
-        ttk.Label(frm, text="Launch Browser:").grid(row=5, column=0, sticky="e", pady=5)
-        self.browser_combo = ttk.Combobox(
-            frm, values=list(self.browser_paths.keys()) or ["None found"], state="readonly"
-        )
-        self.browser_combo.grid(row=5, column=1, sticky="w")
-        if self.browser_paths:
-            self.browser_combo.current(0)
-
-        ttk.Button(frm, text="Open Throttled Browser", command=self.open_browser).grid(
-            row=6, column=0, columnspan=2, pady=10
-        )
-
-        self.status = ttk.Label(frm, text="Idle", foreground="gray")
-        self.status.grid(row=7, column=0, columnspan=2, pady=10)
-
-        # Log window
-        log_frame = ttk.LabelFrame(frm, text="Proxy Log")
-        log_frame.grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
-        self.log_text = tk.Text(log_frame, height=8, width=60, wrap="word", font=("Consolas", 9))
-        self.log_text.pack(fill="both", expand=True)
-        self.log_text.insert("end", "Logs will appear here...\n")
-        self.log_text.configure(state="disabled")
-
-    
-
-    def find_free_port(self, preferred=8888):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            sock.bind(('127.0.0.1', preferred))
-            port = sock.getsockname()[1]
-        except OSError:
-            sock.bind(('127.0.0.1', 0))  # 0 = ask OS for free port
-            port = sock.getsockname()[1]
-        finally:
-            sock.close()
-        return port
-    
-    def launch_proxy_silent(self, proxy_exe, port, adj_up, adj_down):
-        """Launch bandwidth_proxy safely and silently via PowerShell (Windows) or subprocess (macOS/Linux)."""
-        
-
-        sys_os = platform.system().lower()
-        base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(sys.argv[0])))
-        proxy_exe = os.path.join(base_dir, os.path.basename(proxy_exe))
-        pwsh = shutil.which("pwsh") or shutil.which("powershell") or "powershell"
-
-        try:
-            if sys_os == "windows":
-                if not os.path.isfile(proxy_exe):
-                    self.append_log(f"[ERROR] Proxy not found: {proxy_exe}\n")
-                    return None
-
-                # build argument list PowerShell-safe
-                arglist = f"'--port','{port}','--up','{adj_up}','--down','{adj_down}'"
-
-                ps_cmd = [
-                    pwsh, "-NoProfile", "-Command",
-                    (
-                        f'Start-Process -WindowStyle Hidden '
-                        f'-WorkingDirectory "{base_dir}" '
-                        f'-FilePath "{proxy_exe}" '
-                        f'-ArgumentList {arglist}'
-                    )
-                ]
-
-                self.append_log(f"[INFO] Launching proxy via {pwsh}\n")
-                return subprocess.Popen(ps_cmd, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-
-            elif sys_os in ("darwin", "linux"):
-                cmd = [proxy_exe, "--port", str(port), "--up", str(adj_up), "--down", str(adj_down)]
-                return subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    preexec_fn=os.setsid,
-                    cwd=base_dir,
-                    close_fds=True,
-                )
-
-            else:
-                self.append_log(f"[ERROR] Unsupported OS: {sys_os}\n")
-                return None
-
-        except Exception:
-            self.append_log(f"[FATAL] Proxy launch error:\n{traceback.format_exc()}\n")
-            return None
-
-
-
-
-
-
-
-
-    # ---------------------------------------------------------
-    def start_proxy(self):  
-        """Start or restart bandwidth proxy silently."""
-        # If 8888 is in use, stop old proxy first
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        in_use = sock.connect_ex(('127.0.0.1', 8888)) == 0
-        sock.close()
-        if in_use:
-            self.append_log("Port 8888 already active; stopping old proxy first...\n")
-            self.stop_proxy()
-            time.sleep(0.5)
-
-        # Kill any orphaned bandwidth_proxy processes
-        for p in psutil.process_iter(["pid", "name"]):
-            try:
-                if p.info["name"] and p.info["name"].lower().startswith("bandwidth_proxy"):
-                    p.terminate()
-            except Exception:
-                pass
-        time.sleep(0.3)
-
-        # Avoid duplicates
-        if self.proxy_proc and self.proxy_proc.poll() is None:
-            messagebox.showinfo("Proxy", "Proxy is already running.")
-            return
-
-        proxy_exe = get_proxy_path()
-        if not os.path.exists(proxy_exe):
-            messagebox.showerror("Error", f"bandwidth_proxy not found at {proxy_exe}")
-            return
-
-        try:
-            up = float(self.up_var.get())
-            down = float(self.down_var.get())
-            cal = max(0.1, float(self.calib_var.get()))
-        except ValueError:
-            messagebox.showerror("Error", "Upload/Download/Calibration must be numbers.")
-            return
-
-        #    scale and clamp to ≥1 kbps; pass ints
-        adj_up = max(1, int(round(up / cal)))
-        adj_down = max(1, int(round(down / cal)))
-
-        # choose a port (prefer 8888)
-        self.current_port = self.find_free_port(8888)
-        self.append_log(f"Using port {self.current_port} for proxy. (UP={adj_up} kbps, DOWN={adj_down} kbps)\n")
-
-        # --- Launch silently via our helper ---
-        self.proxy_proc = self.launch_proxy_silent(proxy_exe, self.current_port, adj_up, adj_down)
-
-        if not self.proxy_proc:
-            messagebox.showerror("Launch Error", "Proxy failed to start.")
-            return
-
-        # Wait briefly and confirm it’s listening
-        for _ in range(10):
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            try:
-                if s.connect_ex(("127.0.0.1", self.current_port)) == 0:
-                    break
-            finally:
-                s.close()
-            time.sleep(0.1)
-        else:
-            self.append_log("Warning: proxy didn’t open its port yet.\n")
-
-        self.status.config(text="Proxy running ✅", foreground="green")
-        self.append_log("Proxy launched silently.\n")
-
-
-    # ---------------------------------------------------------
-    def stop_proxy(self):
-        
-
-        sys_os = platform.system().lower()
-        pwsh = shutil.which("pwsh") or shutil.which("powershell") or "powershell"
-        killed = False
-
-        if sys_os == "windows":
-            # 1️⃣  Find and kill whatever owns TCP port 8888
-            stop_cmd = [
-                pwsh, "-NoProfile", "-Command",
-                (
-                    "$p = netstat -ano | "
-                    "Select-String ':8888 ' | "
-                    "ForEach-Object { ($_ -split ' +')[-1] } | "
-                    "Select-Object -Unique; "
-                    "if ($p) { Stop-Process -Id $p -Force -ErrorAction SilentlyContinue }"
-                )
-            ]
-            try:
-                subprocess.run(stop_cmd, shell=False,
-                            creationflags=subprocess.CREATE_NO_WINDOW)
-                killed = True
-            except Exception as e:
-                self.append_log(f"[ERROR] PowerShell stop failed: {e}\n")
-
-        else:
-            import psutil
-            for p in psutil.process_iter(["pid", "name", "connections"]):
-                for c in p.connections(kind="inet"):
-                    if c.laddr.port == 8888:
-                        p.terminate()
-                        killed = True
-
-        # verify closure
-        time.sleep(0.5)
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        still_open = s.connect_ex(("127.0.0.1", 8888)) == 0
-        s.close()
-
-        if still_open:
-            self.append_log("[WARN] port 8888 still bound!\n")
-            self.status.config(text="Port 8888 still active", foreground="orange")
-        else:
-            self.append_log("[OK] port 8888 freed.\n")
-            self.status.config(text="Proxy stopped", foreground="red")
-
-
-
-    # ---------------------------------------------------------
-    def open_browser(self):
-        """Cross-platform browser launch with proxy awareness."""
-        choice = self.browser_combo.get()
-        exe = self.browser_paths.get(choice)
-        if not exe:
-            messagebox.showerror("Browser not found", "No browser selected or found.")
-            return
-
-        port = getattr(self, "current_port", 8888)
-        sys_os = platform.system().lower()
-        proxy_arg = f"--proxy-server=http://127.0.0.1:{port}"
-
-        try:
-            # Safari / macOS native fallback (no CLI proxy support)
-            if choice == "Safari":
-                if sys_os == "darwin":
-                    subprocess.Popen(["open", "-a", "Safari", "http://127.0.0.1"])
-                    messagebox.showinfo(
-                        "Safari Notice",
-                        f"Safari ignores CLI proxy flags.\nSet proxy manually to 127.0.0.1:{port}."
-                    )
-                else:
-                    messagebox.showinfo("Notice", "Safari not available on this OS.")
-                return
-
-            temp_profile = None
-            try:
-                temp_profile = tempfile.mkdtemp(prefix="throttle_profile_")
-            except Exception:
-                pass
-
-            args = [exe, "--disable-quic", proxy_arg, "--no-first-run", "--new-window"]
-            if temp_profile:
-                args.append(f"--user-data-dir={temp_profile}")
-
-            # macOS browsers are .app bundles, open with `open -a`
-            if sys_os == "darwin" and exe.endswith(".app"):
-                subprocess.Popen(["open", "-a", exe])
-            else:
-                subprocess.Popen(args, shell=False)
-
-            self.append_log(f"Launched {choice} via proxy port {port}\n")
-            self.status.config(text=f"{choice} launched", foreground="blue")
-
-            if temp_profile:
-                def cleanup():
-                    shutil.rmtree(temp_profile, ignore_errors=True)
-                self.root.protocol("WM_DELETE_WINDOW", lambda: (cleanup(), self.root.destroy()))
-
-        except Exception as e:
-            messagebox.showerror("Launch Error", str(e))
-            self.append_log(f"Launch error: {e}\n")
-
-    # ---------------------------------------------------------
-    def append_log(self, line):
-        self.log_text.configure(state="normal")
-        self.log_text.insert("end", line)
-        self.log_text.see("end")
-        self.log_text.configure(state="disabled")
-
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    ThrottleApp(root)
-    root.mainloop()
+#!/usr/bin/env python3
+"""
+Throttle GUI v5 — Final Stable Version
+--------------------------------------
+Combines modern GUI styling, safe PowerShell process handling,
+and silent background proxy execution.
+"""
+
+import atexit
+import collections
+import concurrent.futures
+import errno
+import functools
+import select
+import signal
+import os
+import sys
+import subprocess
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+import socket
+from pathlib import Path 
+import platform, time
+
+# Hoisted once at import: platform.system() does a uname() call and the
+# PyInstaller base dir never changes while we run.
+_SYS_OS = platform.system().lower()
+_BASE_DIR = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(sys.argv[0])))
+
+def get_proxy_path():
+    """
+    Return the correct proxy path based on platform and build type.
+    - On Windows: use bundled bandwidth_proxy.exe
+    - On macOS/Linux: use bundled bandwidth_proxy.py (or binary if built)
+    """
+    
+
+    exe_proxy = os.path.join(_BASE_DIR, "bandwidth_proxy.exe")
+    bin_proxy = os.path.join(_BASE_DIR, "bandwidth_proxy")
+    py_proxy = os.path.join(_BASE_DIR, "bandwidth_proxy.py")
+
+    # --- Windows build: prefer .exe ---
+    if _SYS_OS == "windows" and os.path.exists(exe_proxy):
+        return exe_proxy
+
+    # --- macOS/Linux build: prefer .py, fallback to compiled binary ---
+    if os.path.exists(py_proxy):
+        return py_proxy
+    if os.path.exists(bin_proxy):
+        return bin_proxy
+
+    # --- Fallback (development mode) ---
+    return exe_proxy if _SYS_OS == "windows" else py_proxy
+
+
+
+
+
+
+# Browsers that honor --user-data-dir (and the other Chromium flags)
+_CHROMIUM = {"Chrome", "Edge", "Brave", "DuckDuckGo"}
+
+# Well-known install locations, built once at import instead of per call
+_COMMON_WIN = {
+    "Edge": [
+        r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+        r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+    ],
+    "Chrome": [
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    ],
+    "Brave": [
+        r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe",
+        r"C:\Program Files (x86)\BraveSoftware\Brave-Browser\Application\brave.exe",
+    ],
+    "Firefox": [
+        r"C:\Program Files\Mozilla Firefox\firefox.exe",
+        r"C:\Program Files (x86)\Mozilla Firefox\firefox.exe",
+    ],
+    "Tor": [
+        r"C:\Program Files\Tor Browser\Browser\firefox.exe",
+        r"C:\Program Files (x86)\Tor Browser\Browser\firefox.exe",
+    ],
+    "DuckDuckGo": [
+        r"C:\Program Files\DuckDuckGo\DuckDuckGo Browser\Application\duckduckgo.exe",
+        r"C:\Program Files (x86)\DuckDuckGo\DuckDuckGo Browser\Application\duckduckgo.exe",
+    ],
+    "Safari": [],  # Safari not on Windows
+}
+
+_COMMON_MAC = {
+    "Safari": ["/Applications/Safari.app/Contents/MacOS/Safari"],
+    "Chrome": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+    "Brave": ["/Applications/Brave Browser.app/Contents/MacOS/Brave Browser"],
+    "Edge": ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"],
+    "Firefox": ["/Applications/Firefox.app/Contents/MacOS/firefox"],
+    "DuckDuckGo": ["/Applications/DuckDuckGo.app/Contents/MacOS/DuckDuckGo"],
+    "Tor": ["/Applications/Tor Browser.app/Contents/MacOS/firefox"],
+}
+
+
+@functools.lru_cache(maxsize=1)
+def find_browsers():
+    """Locate common browsers on Windows and macOS.
+
+    Cached: the install set doesn't change while we run, and the probes
+    hit the disk. First call stats every candidate path concurrently
+    (the work is seek-bound, not CPU-bound); later calls are free.
+    """
+    common = (_COMMON_WIN if _SYS_OS == "windows"
+              else _COMMON_MAC if _SYS_OS == "darwin" else {})
+    if not common:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        found = pool.map(
+            lambda gs: next((g for g in gs if os.path.exists(g)), None),
+            common.values(),
+        )
+    return {name: g for name, g in zip(common, found) if g}
+
+
+
+class ThrottleApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Throttle Test Environment")
+        self.root.geometry("680x560")
+        self.root.resizable(False, False)
+        self.proxy_proc = None
+        self.browser_paths = find_browsers()
+        self.current_port = 8888
+        self._log_buf = collections.deque()
+        self._log_pending = False
+        # One throwaway profile dir per Chromium-family browser per
+        # session, removed in a single atexit hook.  The old per-launch
+        # WM_DELETE_WINDOW override clobbered itself on each call and
+        # leaked every profile but the last.
+        self._profile_cache = {}
+        atexit.register(self._cleanup_profiles)
+        self._pending_status = None
+
+        style = ttk.Style()
+        style.configure("TButton", padding=6, font=("Segoe UI", 10))
+        style.configure("TLabel", font=("Segoe UI", 10))
+        style.configure("TEntry", font=("Segoe UI", 10))
+
+        frm = ttk.Frame(root, padding=20)
+        frm.pack(fill="both", expand=True)
+        frm.grid_rowconfigure(7, weight=1)
+        frm.grid_columnconfigure(0, weight=1)
+
+        # Input fields
+        ttk.Label(frm, text="Upload (kbps):").grid(row=0, column=0, sticky="e", pady=5)
+        ttk.Label(frm, text="Download (kbps):").grid(row=1, column=0, sticky="e", pady=5)
+        ttk.Label(frm, text="Calibration (×):").grid(row=2, column=0, sticky="e", pady=5)
+
+        self.up_var = tk.StringVar(value="200")
+        self.down_var = tk.StringVar(value="500")
+        self.calib_var = tk.StringVar(value="1.0")
+
+        ttk.Entry(frm, textvariable=self.up_var, width=12).grid(row=0, column=1, sticky="w")
+        ttk.Entry(frm, textvariable=self.down_var, width=12).grid(row=1, column=1, sticky="w")
+        ttk.Entry(frm, textvariable=self.calib_var, width=12).grid(row=2, column=1, sticky="w")
+
+        self.preset_combo = ttk.Combobox(
+            frm,
+            values=["1.0 (None)", "2.0 (Light PC)", "3.0 (Win64 fast)"],
+            state="readonly",
+            width=18,
+        )
+        self.preset_combo.grid(row=3, column=1, sticky="w")
+        self.preset_combo.bind(
+            "<<ComboboxSelected>>",
+            lambda e: self.calib_var.set(self.preset_combo.get().split()[0]),
+        )
+
+        ttk.Button(frm, text="Start Proxy", command=self.start_proxy).grid(
+            row=4, column=0, pady=10
+        )
+        ttk.Button(frm, text="Stop Proxy", command=self.stop_proxy).grid(
+            row=4, column=1, pady=10
+        )
+
+        ttk.Label(frm, text="Launch Browser:").grid(row=5, column=0, sticky="e", pady=5)
+        self.browser_combo = ttk.Combobox(
+            frm, values=list(self.browser_paths.keys()) or ["None found"], state="readonly"
+        )
+        self.browser_combo.grid(row=5, column=1, sticky="w")
+        if self.browser_paths:
+            self.browser_combo.current(0)
+
+        ttk.Button(frm, text="Open Throttled Browser", command=self.open_browser).grid(
+            row=6, column=0, columnspan=2, pady=10
+        )
+
+        self.status = ttk.Label(frm, text="Idle", foreground="gray")
+        self.status.grid(row=7, column=0, columnspan=2, pady=10)
+
+        # Log window
+        log_frame = ttk.LabelFrame(frm, text="Proxy Log")
+        log_frame.grid(row=8, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+        self.log_text = tk.Text(log_frame, height=8, width=60, wrap="word", font=("Consolas", 9))
+        self.log_text.pack(fill="both", expand=True)
+        self.log_text.insert("end", "Logs will appear here...\n")
+        self.log_text.configure(state="disabled")
+
+    
+
+    def _port_listening(self, port):
+        """True if something is bound to *port* on loopback.
+
+        A bind attempt is one syscall; the old connect_ex probe did a
+        full handshake on hit and a connect+close round-trip on miss.
+        SO_REUSEADDR keeps lingering TIME_WAIT sockets from making a
+        free port look busy — but only on POSIX: on Windows the flag
+        would let the bind succeed over a live listener and the check
+        would lie.
+        """
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if _SYS_OS != "windows":
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(('127.0.0.1', port))
+            return False
+        except OSError:
+            return True
+        finally:
+            s.close()
+
+    def find_free_port(self, preferred=8888):
+        """Reserve a free port and return (socket, port).
+
+        The bound socket is kept open so nothing else can grab the port
+        between the check and the proxy's own bind; the caller must close
+        it right before launching the proxy.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # POSIX only, as in _port_listening: on Windows SO_REUSEADDR
+        # lets the bind succeed over a live listener, so a genuinely
+        # busy preferred port would be "reserved" anyway and the child
+        # proxy would then fail to bind it.
+        if _SYS_OS != "windows":
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        try:
+            sock.bind(('127.0.0.1', preferred))
+        except OSError:
+            sock.bind(('127.0.0.1', 0))  # 0 = ask OS for free port
+        return sock, sock.getsockname()[1]
+    
+    def launch_proxy_silent(self, proxy_exe, port, adj_up, adj_down):
+        """Launch bandwidth_proxy safely and silently via PowerShell (Windows) or subprocess (macOS/Linux)."""
+        
+
+        try:
+            if _SYS_OS == "windows":
+                if not os.path.isfile(proxy_exe):
+                    self.append_log(f"[ERROR] Proxy not found: {proxy_exe}\n")
+                    return None
+
+                # Launch the proxy directly with a hidden window.  The old
+                # PowerShell Start-Process hop cost a full interpreter
+                # start (hundreds of ms, tens of MB) per click; the
+                # STARTUPINFO + CREATE_NO_WINDOW combo hides the console
+                # without any intermediate host process.
+                si = subprocess.STARTUPINFO()
+                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                si.wShowWindow = subprocess.SW_HIDE
+
+                cmd = [proxy_exe, "--port", str(port), "--up", str(adj_up), "--down", str(adj_down)]
+                self.append_log("[INFO] Launching proxy directly (hidden)\n")
+                return subprocess.Popen(
+                    cmd,
+                    startupinfo=si,
+                    creationflags=subprocess.CREATE_NO_WINDOW | subprocess.DETACHED_PROCESS,
+                    cwd=_BASE_DIR,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    close_fds=True,
+                )
+
+            elif _SYS_OS in ("darwin", "linux"):
+                cmd = [proxy_exe, "--port", str(port), "--up", str(adj_up), "--down", str(adj_down)]
+                return subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                    cwd=_BASE_DIR,
+                    close_fds=True,
+                )
+
+            else:
+                self.append_log(f"[ERROR] Unsupported OS: {_SYS_OS}\n")
+                return None
+
+        except Exception:
+            import traceback
+            self.append_log(f"[FATAL] Proxy launch error:\n{traceback.format_exc()}\n")
+            return None
+
+
+
+
+
+
+
+
+    # ---------------------------------------------------------
+    def start_proxy(self):  
+        """Start or restart bandwidth proxy silently."""
+        # If 8888 is in use, stop old proxy first
+        in_use = self._port_listening(8888)
+        if in_use:
+            self.append_log("Port 8888 already active; stopping old proxy first...\n")
+            self.stop_proxy()
+            time.sleep(0.5)
+
+            # Kill any orphaned proxy still bound to the preferred port.
+            # Only worth doing when the port was actually busy — on a
+            # clean first run there is nothing to scan or wait for.
+            self._terminate_port_owners(8888)
+            time.sleep(0.3)
+
+        # Avoid duplicates
+        if self.proxy_proc and self.proxy_proc.poll() is None:
+            messagebox.showinfo("Proxy", "Proxy is already running.")
+            return
+
+        proxy_exe = get_proxy_path()
+        if not os.path.exists(proxy_exe):
+            messagebox.showerror("Error", f"bandwidth_proxy not found at {proxy_exe}")
+            return
+
+        try:
+            up = float(self.up_var.get())
+            down = float(self.down_var.get())
+            cal = max(0.1, float(self.calib_var.get()))
+        except ValueError:
+            messagebox.showerror("Error", "Upload/Download/Calibration must be numbers.")
+            return
+
+        #    scale and clamp to ≥1 kbps; pass ints
+        adj_up = max(1, int(round(up / cal)))
+        adj_down = max(1, int(round(down / cal)))
+
+        # choose a port (prefer 8888) and hold the reservation until launch
+        self._port_reservation, self.current_port = self.find_free_port(8888)
+        self.append_log(f"Using port {self.current_port} for proxy. (UP={adj_up} kbps, DOWN={adj_down} kbps)\n")
+
+        # --- Launch silently via our helper ---
+        # Release the reservation only now: the proxy child binds the
+        # same port itself, and holding our socket across its bind would
+        # make that fail on POSIX.
+        self._port_reservation.close()
+        self._port_reservation = None
+        self.proxy_proc = self.launch_proxy_silent(proxy_exe, self.current_port, adj_up, adj_down)
+
+        if not self.proxy_proc:
+            messagebox.showerror("Launch Error", "Proxy failed to start.")
+            return
+
+        # Wait up to ~1 s and confirm it’s listening.  The non-blocking
+        # probe socket is reused only while a connect is genuinely in
+        # progress; a refused attempt burns the fd (Winsock won't retry
+        # a failed socket and POSIX leaves the stale error on it), so
+        # those get a fresh socket after a short sleep.
+        connected = {0, errno.EISCONN, getattr(errno, "WSAEISCONN", errno.EISCONN)}
+        pending = {errno.EINPROGRESS, errno.EALREADY, errno.EWOULDBLOCK,
+                   getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)}
+
+        def fresh_probe():
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.setblocking(False)
+            return s
+
+        deadline = time.monotonic() + 1.0
+        ready = False
+        probe = fresh_probe()
+        try:
+            while True:
+                err = probe.connect_ex(("127.0.0.1", self.current_port))
+                if err in connected:
+                    ready = True
+                    break
+                if err in pending:
+                    # A failed connect is reported on exceptfds on
+                    # Windows, as writable-with-SO_ERROR on POSIX.
+                    _, writable, failed = select.select([], [probe], [probe], 0.1)
+                    if writable and not failed and probe.getsockopt(
+                            socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        ready = True
+                        break
+                    if writable or failed:
+                        # Refused: retry on a new socket after a pause.
+                        probe.close()
+                        probe = fresh_probe()
+                        time.sleep(0.1)
+                    # select timed out: connect still in progress, retry.
+                else:
+                    # Immediate refusal (e.g. ECONNREFUSED/ECONNABORTED).
+                    probe.close()
+                    probe = fresh_probe()
+                    time.sleep(0.1)
+                if time.monotonic() >= deadline:
+                    break
+        finally:
+            probe.close()
+        if not ready:
+            self.append_log("Warning: proxy didn’t open its port yet.\n")
+
+        self._set_status("Proxy running ✅", "green")
+        self.append_log("Proxy launched silently.\n")
+
+
+    # ---------------------------------------------------------
+    def _terminate_port_owners(self, port):
+        """Terminate every process listening on *port*; SIGKILL stragglers.
+
+        One psutil connection walk replaces the old PowerShell + netstat
+        text pipeline (two process launches and hundreds of ms per stop)
+        and works identically on Windows, macOS and Linux.
+        """
+        # Imported here so the GUI window doesn't pay for psutil's C
+        # extension (~8 MB RSS) before anything needs killing.
+        import psutil
+
+        targets = set()
+        try:
+            for c in psutil.net_connections(kind="inet"):
+                if c.laddr and c.laddr.port == port and c.status == psutil.CONN_LISTEN and c.pid:
+                    targets.add(c.pid)
+        except psutil.Error as e:
+            self.append_log(f"[ERROR] Connection scan failed: {e}\n")
+
+        procs = []
+        for pid in targets:
+            try:
+                p = psutil.Process(pid)
+                p.terminate()
+                procs.append(p)
+            except psutil.NoSuchProcess:
+                pass
+
+        # Give the proxies a moment to exit cleanly, then escalate.
+        if procs:
+            gone, alive = psutil.wait_procs(procs, timeout=1.0)
+            for p in alive:
+                try:
+                    p.kill()
+                except psutil.NoSuchProcess:
+                    pass
+        return len(procs)
+
+    # ---------------------------------------------------------
+    def stop_proxy(self):
+        port = getattr(self, "current_port", 8888)
+
+        # If we own the proxy, kill its whole process group on POSIX so
+        # any helpers it forked die with it (the child is a session
+        # leader thanks to start_new_session=True), escalating to
+        # SIGKILL after a grace period.
+        if (_SYS_OS != "windows" and self.proxy_proc
+                and self.proxy_proc.poll() is None):
+            try:
+                pgid = os.getpgid(self.proxy_proc.pid)
+                os.killpg(pgid, signal.SIGTERM)
+                try:
+                    self.proxy_proc.wait(timeout=1.5)
+                except subprocess.TimeoutExpired:
+                    os.killpg(pgid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            self.proxy_proc = None
+        else:
+            self._terminate_port_owners(port)
+
+        # verify closure
+        time.sleep(0.5)
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        still_open = s.connect_ex(("127.0.0.1", port)) == 0
+        s.close()
+
+        if still_open:
+            self.append_log(f"[WARN] port {port} still bound!\n")
+            self._set_status(f"Port {port} still active", "orange")
+        else:
+            self.append_log(f"[OK] port {port} freed.\n")
+            self._set_status("Proxy stopped", "red")
+
+
+
+    # ---------------------------------------------------------
+    def open_browser(self):
+        """Cross-platform browser launch with proxy awareness."""
+        choice = self.browser_combo.get()
+        exe = self.browser_paths.get(choice)
+        if not exe:
+            messagebox.showerror("Browser not found", "No browser selected or found.")
+            return
+
+        port = getattr(self, "current_port", 8888)
+        proxy_arg = f"--proxy-server=http://127.0.0.1:{port}"
+
+        try:
+            # Safari / macOS native fallback (no CLI proxy support)
+            if choice == "Safari":
+                if _SYS_OS == "darwin":
+                    subprocess.Popen(["open", "-a", "Safari", "http://127.0.0.1"])
+                    messagebox.showinfo(
+                        "Safari Notice",
+                        f"Safari ignores CLI proxy flags.\nSet proxy manually to 127.0.0.1:{port}."
+                    )
+                else:
+                    messagebox.showinfo("Notice", "Safari not available on this OS.")
+                return
+
+            # One profile per browser per session — re-launching the same
+            # browser reuses the cached dir instead of writing a new one
+            # to disk on every click.  Tor must keep its bundled profile
+            # (that's where the Tor launcher and proxy wiring live), so
+            # it gets no profile args at all.
+            temp_profile = None
+            if choice != "Tor":
+                try:
+                    if choice not in self._profile_cache:
+                        import tempfile
+                        self._profile_cache[choice] = tempfile.mkdtemp(
+                            prefix=f"throttle_{choice}_"
+                        )
+                    temp_profile = self._profile_cache[choice]
+                except Exception:
+                    pass
+
+            if choice in _CHROMIUM:
+                args = [exe, "--disable-quic", proxy_arg, "--no-first-run", "--new-window"]
+                if temp_profile:
+                    args.append(f"--user-data-dir={temp_profile}")
+            elif choice == "Tor":
+                args = [exe]
+            else:
+                # Firefox silently ignores --user-data-dir and the other
+                # Chromium flags; its isolation spelling is -profile plus
+                # -no-remote (proxy still has to be set in the profile
+                # itself).
+                args = [exe, "-no-remote"]
+                if temp_profile:
+                    args += ["-profile", temp_profile]
+
+            # macOS browsers are .app bundles, open with `open -a`
+            if _SYS_OS == "darwin" and exe.endswith(".app"):
+                subprocess.Popen(["open", "-a", exe])
+            else:
+                subprocess.Popen(args, shell=False)
+
+            self.append_log(f"Launched {choice} via proxy port {port}\n")
+            self._set_status(f"{choice} launched", "blue")
+
+        except Exception as e:
+            messagebox.showerror("Launch Error", str(e))
+            self.append_log(f"Launch error: {e}\n")
+
+    def _set_status(self, text, color):
+        # Coalesce bursts (stop then start updates several times in a
+        # row) into one label repaint on the next idle slot.
+        self._pending_status = (text, color)
+        self.root.after_idle(self._apply_status)
+
+    def _apply_status(self):
+        if self._pending_status:
+            text, color = self._pending_status
+            self._pending_status = None
+            self.status.config(text=text, foreground=color)
+
+    def _cleanup_profiles(self):
+        if not self._profile_cache:
+            return
+        import shutil
+
+        for path in self._profile_cache.values():
+            shutil.rmtree(path, ignore_errors=True)
+        self._profile_cache.clear()
+
+    # ---------------------------------------------------------
+    def append_log(self, line):
+        # Buffer lines and flush once per 50 ms tick: bursts of messages
+        # (proxy startup prints several back-to-back) would otherwise
+        # force a layout + scroll recompute on the Tk loop per line.
+        self._log_buf.append(line)
+        if not self._log_pending:
+            self._log_pending = True
+            self.root.after(50, self._flush_log)
+
+    def _flush_log(self):
+        text = "".join(self._log_buf)
+        self._log_buf.clear()
+        self._log_pending = False
+        self.log_text.configure(state="normal")
+        self.log_text.insert("end", text)
+        # Trim the widget so it never grows unbounded.
+        if int(self.log_text.index("end-1c").split(".")[0]) > 1000:
+            self.log_text.delete("1.0", "100.0")
+        self.log_text.see("end")
+        self.log_text.configure(state="disabled")
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    ThrottleApp(root)
+    root.mainloop()
@@ -49,17 +49,24 @@ class ThrottleApp:
             messagebox.showerror("Error", f"bandwidth_proxy.exe not found in {os.path.dirname(sys.argv[0])}")
             return
 
-        cmd = [
-            "powershell",
-            "-WindowStyle", "Hidden",
-            "-Command",
-            f"Start-Process -WindowStyle Hidden -FilePath '{proxy_exe}' "
-            f"-ArgumentList '--port','8888','--up','{self.up.get()}','--down','{self.down.get()}'"
-        ]
+        # Launch the proxy directly with a hidden window — the old
+        # PowerShell Start-Process hop started two powershell.exe hosts
+        # just to hide a console.
+        si = subprocess.STARTUPINFO()
+        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        si.wShowWindow = subprocess.SW_HIDE
+        cmd = [proxy_exe, "--port", "8888", "--up", self.up.get(), "--down", self.down.get()]
 
         try:
-            # Start PowerShell host for the proxy
-            self.proxy_proc = subprocess.Popen(cmd, creationflags=subprocess.CREATE_NO_WINDOW)
+            self.proxy_proc = subprocess.Popen(
+                cmd,
+                startupinfo=si,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=True,
+            )
             self.status.config(text="Proxy running", foreground="green")
         except Exception as e:
             messagebox.showerror("Launch Error", f"Failed to start proxy: {e}")
@@ -67,24 +74,40 @@ class ThrottleApp:
     # -------------------------------------------------------------
     def stop_proxy(self):
         killed = False
-        # Kill proxy process directly
+        # Kill proxy process directly; since we own the child, terminate
+        # + wait with a kill escalation is all that's needed
         if self.proxy_proc and self.proxy_proc.poll() is None:
             try:
                 self.proxy_proc.terminate()
+                try:
+                    self.proxy_proc.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    self.proxy_proc.kill()
                 killed = True
             except Exception:
                 pass
             self.proxy_proc = None
-
-        # Kill any orphaned PowerShell running bandwidth_proxy.exe
-        for p in psutil.process_iter(["pid", "name", "cmdline"]):
-            try:
-                if p.info["name"] and "powershell" in p.info["name"].lower():
-                    if any("bandwidth_proxy.exe" in arg for arg in (p.info.get("cmdline") or [])):
+        else:
+            # Fallback for proxies we didn't start (e.g. a previous GUI
+            # instance crashed): look for leftover PowerShell hosts from
+            # the old launch path
+            # Two-stage filter: names are cheap to list, command lines
+            # are a per-process PEB read on Windows — only fetch them
+            # for the handful of PowerShell (or proxy-named) processes.
+            for p in psutil.process_iter(["name"]):
+                name = (p.info["name"] or "").lower()
+                if "powershell" not in name and "bandwidth_proxy" not in name:
+                    continue
+                try:
+                    cl = p.cmdline()
+                except psutil.Error:
+                    continue
+                if "bandwidth_proxy" in name or any("bandwidth_proxy.exe" in a for a in cl):
+                    try:
                         p.terminate()
                         killed = True
-            except Exception:
-                continue
+                    except psutil.Error:
+                        continue
 
         if killed:
             self.status.config(text="Proxy stopped", foreground="red")